@@ -1,124 +1,330 @@
 import os
-from PIL import Image, ExifTags
-from collections import defaultdict, Counter
-import matplotlib.pyplot as plt
-import numpy as np  # 用于颜色渐变计算
+import sys
+import math
+import itertools
+import contextlib
+import logging
+import logging.handlers
+import multiprocessing
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from PIL import Image, ExifTags, UnidentifiedImageError
+# 直接使用 Figure 对象绘图，不经过 pyplot 的全局图表管理，也不需要交互式后端
+from matplotlib.figure import Figure
+import numpy as np
 
-# 提取焦距和光圈
-def extract_focal_and_aperture(img_path):
+log = logging.getLogger(__name__)
+# 主进程创建的日志队列；子进程通过 _init_worker_logging 拿到同一个队列
+_log_queue = None
+# 多个文件夹线程共用 stdout 输出进度，每行加锁一次写出，避免行内交错
+_print_lock = threading.Lock()
+
+# 焦距统计范围（mm）
+FOCAL_MIN, FOCAL_MAX = 15, 200
+# 定义标准光圈值列表（从f1.4到f16）
+STANDARD_APERTURES = [1.4, 2.0, 2.8, 4.0, 5.6, 8.0, 11.0, 16.0]
+# 统计矩阵形状：每个整数焦距一行，每档标准光圈一列
+STATS_SHAPE = (FOCAL_MAX - FOCAL_MIN + 1, len(STANDARD_APERTURES))
+# EXIF 缓存文件，按 (路径, 修改时间, 大小) 记录原始 EXIF 数值，重复运行时跳过未改动的照片
+CACHE_PATH = ".exif_cache.sqlite"
+# 缓存格式版本；_raw_from_exif 的提取逻辑（包括裁切系数表）改动时加 1，旧缓存整表作废
+_CACHE_VERSION = 2
+# 每批处理的照片数，限制超大目录下路径列表和待提交任务占用的内存
+BATCH_SIZE = 50_000
+
+# 快速判断文件是否带 EXIF：逐个跳过 SOS 之前的 JPEG 段，只读段头，查找 APP1 的 Exif 标识
+# 返回 False 即确定没有 EXIF；结构不认识时返回 True，交给 PIL 判断
+def _has_exif(path):
+    with open(path, 'rb') as f:
+        if f.read(2) != b'\xff\xd8':
+            return True  # 不是 JPEG 开头
+        while True:
+            header = f.read(4)
+            if len(header) < 4 or header[0] != 0xFF or header[1] == 0xFF:
+                return True
+            marker = header[1]
+            if marker in (0xDA, 0xD9):
+                return False  # 已到图像数据（SOS）或文件结束（EOI），之后不会再有 EXIF
+            length = int.from_bytes(header[2:], 'big') - 2
+            if marker == 0xE1:
+                if f.read(6) == b'Exif\x00\x00':
+                    return True
+                length -= 6
+            f.seek(length, os.SEEK_CUR)
+
+# 用到的 EXIF 标签编号，模块加载时取一次，避免每张照片都查枚举
+_MAKE = ExifTags.Base.Make.value  # 0x010F，IFD0
+_MODEL = ExifTags.Base.Model.value  # 0x0110，IFD0
+_FOCAL = ExifTags.Base.FocalLength.value  # 0x920A，Exif 子 IFD
+_FOCAL35 = ExifTags.Base.FocalLengthIn35mmFilm.value  # 0xA405，Exif 子 IFD
+_FNUM = ExifTags.Base.FNumber.value  # 0x829D，Exif 子 IFD
+_EXIF_IFD = ExifTags.IFD.Exif.value  # 0x8769
+
+# 确定没有可用 EXIF（无 EXIF 段、不是 JPEG、标签值损坏）时返回的原始数据，会写入缓存
+_MISSING_RAW = (math.nan, math.nan, math.nan, math.nan)
+# 读取时发生 I/O 错误（磁盘拔出、权限、EIO 等）时返回，不写入缓存，下次运行重新读取
+_READ_FAILED = None
+
+# 读取单张照片的原始 EXIF 数值（在进程池中运行）
+# 返回 (35mm等效焦距, 实际焦距, 光圈, 裁切系数)，换算交给 _convert_raw 批量完成
+def _read_raw_exif(img_path):
+    # 只在打开文件时捕获 I/O 和格式错误，其余代码不包在 try 里
     try:
-        img = Image.open(img_path)
-        exif_data = img._getexif()
-        if not exif_data:
-            return None, None
-
-        exif = {
-            ExifTags.TAGS.get(k, k): v
-            for k, v in exif_data.items()
-        }
-
-        # 获取相机型号（从TIFF标签中读取）
-        make = exif.get('Make', '').strip()  # 制造商
-        model = exif.get('Model', '').strip()  # 型号
-
-        # 根据相机型号确定转换系数
-        if 'Canon' in make and 'EOS M' in model:
-            crop_factor = 1.6  # Canon APS-C
-        elif 'FUJIFILM' in make and 'X-T' in model:
-            crop_factor = 1.5  # Fuji APS-C
-        else:
-            crop_factor = 1.0  # 全画幅或其他
-
-        # 获取焦距（优先35mm等效）
-        focal = exif.get('FocalLengthIn35mmFilm')
-        # 如果是Canon相机且没有35mm等效焦距，则手动换算
-        if crop_factor > 1.0 and not focal:  # 如果是APS-C相机且没有35mm等效焦距
-            raw_focal = exif.get('FocalLength')
-            if isinstance(raw_focal, tuple):
-                focal = round((raw_focal[0] / raw_focal[1]) * crop_factor)
-            elif raw_focal:
-                focal = round(raw_focal * crop_factor)
-        # 如果是Fuji相机，直接使用FocalLengthIn35mmFilm
-        elif not focal:
-            raw_focal = exif.get('FocalLength')
-            if isinstance(raw_focal, tuple):
-                focal = round(raw_focal[0] / raw_focal[1])
-            elif raw_focal:
-                focal = round(raw_focal)
-
-        # 限制焦距在15-200范围内
-        if focal:
-            if focal < 15:
-                focal = 15
-            elif focal > 200:
-                focal = 200
-
-        # 获取光圈
-        aperture = exif.get('FNumber')
-        if isinstance(aperture, tuple):
-            raw_aperture = aperture[0] / aperture[1]
-            # 对APS-C相机，光圈值也需要乘以转换系数
-            aperture = round(raw_aperture * crop_factor, 1)
-        elif aperture:
-            # 对APS-C相机，光圈值也需要乘以转换系数
-            aperture = round(aperture * crop_factor, 1)
-
-        return focal, aperture
-
-    except Exception as e:
-        print(f"Error reading {img_path}: {e}")
+        if not _has_exif(img_path):
+            return _MISSING_RAW  # 没有 EXIF（如导出图、缩略图），不必交给 PIL 解析
+        # Image.open 只解析文件头和 APP 段，不解码像素；读完 EXIF 立即关闭文件
+        # 只尝试 JPEG 插件，跳过对其他格式的逐一识别
+        # getexif() 按需解析，只取用到的几个标签，不再构建完整的 EXIF 字典
+        with Image.open(img_path, formats=['JPEG']) as img:
+            exif = img.getexif()
+    except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+        # 文件内容本身有问题，结果是确定的
+        log.warning("Error reading %s: %s", img_path, e)
+        return _MISSING_RAW
+    except OSError as e:
+        log.warning("Error reading %s: %s", img_path, e)
+        return _READ_FAILED
+    if not exif:
+        return _MISSING_RAW
+
+    try:
+        return _raw_from_exif(exif)
+    except (KeyError, TypeError, ValueError, AttributeError, ZeroDivisionError) as e:
+        # EXIF 标签值损坏（类型不对、分母为 0 等）
+        log.warning("Error reading %s: %s", img_path, e)
+        return _MISSING_RAW
+
+# 把 EXIF 有理数（元组或 IFDRational）转成浮点数，缺失时为 nan
+def _as_float(value):
+    if isinstance(value, tuple):
+        return value[0] / value[1]
+    return float(value) if value is not None else math.nan
+
+# 从已读取的 EXIF 中取出焦距、光圈和裁切系数，等效焦距和实际焦距分开返回
+def _raw_from_exif(exif):
+    # 焦距、光圈位于 Exif 子 IFD 中
+    exif_ifd = exif.get_ifd(_EXIF_IFD)
+
+    # 获取相机型号（从TIFF标签中读取）
+    make = exif.get(_MAKE, '').strip()  # 制造商
+    model = exif.get(_MODEL, '').strip()  # 型号
+
+    # 根据相机型号确定转换系数
+    if 'Canon' in make and 'EOS M' in model:
+        crop_factor = 1.6  # Canon APS-C
+    elif 'FUJIFILM' in make and 'X-T' in model:
+        crop_factor = 1.5  # Fuji APS-C
+    else:
+        crop_factor = 1.0  # 全画幅或其他
+
+    # 获取焦距：35mm等效焦距（机身记录的等效值）和镜头实际焦距
+    focal35 = _as_float(exif_ifd.get(_FOCAL35))
+    focal = _as_float(exif_ifd.get(_FOCAL))
+
+    # 获取光圈
+    aperture = _as_float(exif_ifd.get(_FNUM))
+
+    return focal35, focal, aperture, crop_factor
+
+# 对 N×4 的原始数据一次性完成换算，返回 (焦距, 光圈) 两个数组，缺少信息的照片对应 nan
+# apply_crop_factor=True：焦距优先用35mm等效值，没有时用实际焦距乘以转换系数；
+#   对APS-C相机，光圈值也需要乘以转换系数
+# apply_crop_factor=False：返回镜头实际焦距和光圈，完全不使用等效值和转换系数
+def _convert_raw(raw, apply_crop_factor=True):
+    focal35, focal, aperture, crop_factor = raw.T
+    if apply_crop_factor:
+        focal = np.where(focal35 > 0, focal35, focal * crop_factor)
+        aperture = aperture * crop_factor
+    focal = np.rint(focal)
+    aperture = np.round(aperture, 1)
+    # 限制焦距在15-200范围内；四舍五入后为 0 视为缺失
+    focal = np.where(focal > 0, np.clip(focal, FOCAL_MIN, FOCAL_MAX), np.nan)
+    return focal, aperture
+
+# 提取焦距和光圈
+def extract_focal_and_aperture(img_path, *, apply_crop_factor=True):
+    raw, _ = _stack_raw([_read_raw_exif(img_path)])
+    focal, aperture = _convert_raw(raw, apply_crop_factor)
+    if not (focal[0] > 0 and aperture[0] > 0):
         return None, None
+    return int(focal[0]), float(aperture[0])
+
+# 用 os.scandir 递归查找 JPEG，DirEntry 自带类型信息，无需额外 stat
+# 返回 DirEntry 本身，后续可直接用其缓存的 stat() 结果
+def _iter_jpegs(root):
+    try:
+        entries = os.scandir(root)
+    except OSError:
+        return  # 与 os.walk 一致：目录不存在或无权限时直接跳过
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith("._"):
+                continue  # 跳过 macOS 资源分叉文件
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_jpegs(entry.path)
+            elif name.lower().endswith((".jpg", ".jpeg")):
+                yield entry
+
+# 进程池初始化：把本进程的日志写入队列，由主进程的单个线程统一输出
+# 避免大量子进程同时争用 stdout
+def _init_worker_logging(queue):
+    global _log_queue
+    if queue is None:
+        return
+    _log_queue = queue
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(queue)]
+    root.setLevel(logging.INFO)
+
+# 创建读取 EXIF 用的进程池；子进程在第一次提交任务时才启动
+def _new_pool(max_workers=None):
+    return ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        initializer=_init_worker_logging,
+        initargs=(_log_queue,),
+    )
+
+# 批量提取焦距和光圈：每个核一个常驻进程，按块分发文件
+# 子进程只返回原始数值，换算在主进程中对整个数组一次完成
+# 传入 executor 时复用已有进程池，便于分批调用
+# 供外部调用的接口；analyze_folder_recursive 要把原始数值写入缓存，还要知道哪些照片
+# 读取失败（不写入缓存），所以直接使用下面的 _read_raw_batch
+def extract_focal_and_aperture_batch(paths, max_workers=None, *, apply_crop_factor=True, executor=None):
+    if executor is None:
+        with _new_pool(max_workers) as ex:
+            return extract_focal_and_aperture_batch(
+                paths, apply_crop_factor=apply_crop_factor, executor=ex
+            )
+    raw, _ = _read_raw_batch(paths, executor)
+    return _convert_raw(raw, apply_crop_factor)
+
+# 在进程池中读取一批照片的原始数值，返回 (N×4 数组, 是否读取失败的布尔数组)
+def _read_raw_batch(paths, executor):
+    # chunksize 用于摊薄进程间通信开销
+    return _stack_raw(executor.map(_read_raw_exif, paths, chunksize=64))
+
+# 把 _read_raw_exif 的结果拼成 N×4 数组；读取失败的行填 nan，并单独标记出来
+def _stack_raw(results):
+    results = list(results)
+    failed = np.array([r is _READ_FAILED for r in results], dtype=bool)
+    raw = np.array(
+        [_MISSING_RAW if r is _READ_FAILED else r for r in results], dtype=np.float64
+    ).reshape(-1, 4)
+    return raw, failed
+
+# 打开 EXIF 缓存；多个文件夹同时处理时共用同一个文件，用 WAL 模式减少锁等待
+def _open_cache():
+    db = sqlite3.connect(CACHE_PATH, timeout=30)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=OFF")
+    # 版本检查和建表放在同一个写事务里，多个文件夹同时打开缓存时不会互相删表
+    db.execute("BEGIN IMMEDIATE")
+    if db.execute("PRAGMA user_version").fetchone()[0] != _CACHE_VERSION:
+        db.execute("DROP TABLE IF EXISTS cache")
+        db.execute(f"PRAGMA user_version = {_CACHE_VERSION}")
+    # 存 _read_raw_exif 的四个原始数值，换算在读出后进行，换算方式改变时缓存依然有效
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS cache("
+        "path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER,"
+        " focal35 REAL, focal REAL, aperture REAL, crop_factor REAL)"
+    )
+    db.commit()
+    return db
 
 # 遍历根目录和所有子目录
-def analyze_folder_recursive(folder_path):
-    stats = defaultdict(Counter)
+# 返回 STATS_SHAPE 形状的计数矩阵：stats[焦距 - FOCAL_MIN, 光圈档位]
+# apply_crop_factor 与 extract_focal_and_aperture 相同；缓存的是原始数值，两种统计共用同一份缓存
+# 传入 executor 时使用共享的进程池，否则新建一个
+def analyze_folder_recursive(folder_path, max_workers=None, *, apply_crop_factor=True, executor=None):
+    counts = np.zeros(STATS_SHAPE[0] * STATS_SHAPE[1], dtype=np.int64)
+    db = _open_cache()
+    try:
+        # 目录边遍历边分批处理，内存占用只与 BATCH_SIZE 有关，与照片总数无关
+        # （Executor.map 会一次性提交全部任务，不能直接把整个生成器交给它）
+        pool = contextlib.nullcontext(executor) if executor else _new_pool(max_workers)
+        with pool as ex:
+            for entries in itertools.batched(_iter_jpegs(folder_path), BATCH_SIZE):
+                counts += _analyze_batch(db, ex, entries, apply_crop_factor)
+    finally:
+        db.close()
+    return counts.reshape(STATS_SHAPE)
 
-    for root, _, files in os.walk(folder_path):
-        for filename in files:
-            if filename.startswith("._"):
-                continue  # 跳过 macOS 资源分叉文件
-            if filename.lower().endswith((".jpg", ".jpeg")):
-                path = os.path.join(root, filename)
-                focal, aperture = extract_focal_and_aperture(path)
-                if not focal or not aperture:
-                    continue  # 缺少必要 EXIF 信息，跳过
-                stats[focal][aperture] += 1
+# 统计一批照片：先查缓存，只把新增或改动过的照片交给进程池读取 EXIF
+def _analyze_batch(db, ex, entries, apply_crop_factor=True):
+    cached, misses = [], []
+    for entry in entries:
+        try:
+            st = entry.stat()
+        except OSError as e:
+            # 失效的符号链接、遍历后被删除或移动的照片，直接跳过
+            log.warning("Error reading %s: %s", entry.path, e)
+            continue
+        key = (entry.path, st.st_mtime_ns, st.st_size)
+        row = db.execute(
+            "SELECT focal35, focal, aperture, crop_factor FROM cache"
+            " WHERE path=? AND mtime=? AND size=?",
+            key,
+        ).fetchone()
+        if row is not None:
+            cached.append(row)
+        else:
+            misses.append(key)
+
+    raw, failed = _read_raw_batch([m[0] for m in misses], ex)
+    # 确定没有 EXIF 的照片也记下来（nan 存为 NULL），下次同样跳过；
+    # I/O 出错的照片不写入缓存，下次重新读取。每批写入放在一个事务里
+    with db:
+        db.executemany(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                miss + tuple(values)
+                for miss, values, bad in zip(misses, raw.tolist(), failed.tolist())
+                if not bad
+            ],
+        )
 
-    return stats
+    # 缓存中的 NULL 读出为 None，转成数组后即为 nan；缓存和新读取的照片一起换算
+    raw = np.concatenate([np.array(cached, dtype=np.float64).reshape(-1, 4), raw])
+    codes = _bucketize(*_convert_raw(raw, apply_crop_factor))
+    return np.bincount(codes, minlength=STATS_SHAPE[0] * STATS_SHAPE[1])
+
+# 把 (焦距, 光圈) 数组直接编码为 bincount 用的整数：(焦距 - FOCAL_MIN) * 8 + 光圈档位
+# 光圈分档和编码在过滤后的副本上原地完成；过滤掩码和最后的整数转换仍会各分配一次数组
+def _bucketize(focal, aperture):
+    valid = (focal > 0) & (aperture > 0)  # 缺少必要 EXIF 信息，跳过
+    focal, codes = focal[valid], aperture[valid]  # 布尔索引返回副本，可以原地修改
+
+    # 标准光圈按 √2 等比排列，第 k 档约为 1.4 * 2^(k/2)，可直接由对数算出档位
+    # 超出 f1.4-f16 范围的归到两端
+    codes /= 1.4
+    np.log2(codes, out=codes)
+    codes *= 2
+    np.rint(codes, out=codes)
+    np.clip(codes, 0, len(STANDARD_APERTURES) - 1, out=codes)
+
+    focal -= FOCAL_MIN
+    focal *= len(STANDARD_APERTURES)
+    codes += focal
+    return codes.astype(np.intp)
 
 # 绘制堆叠柱状图
-def plot_stacked_bars(stats):
-    focal_lengths = sorted(stats.keys())
-    # 定义标准光圈值列表（从f1.4到f16）
-    standard_apertures = [1.4, 2.0, 2.8, 4.0, 5.6, 8.0, 11.0, 16.0]
-
-    # 处理光圈值，限制在f1.4到f16范围内
-    processed_stats = defaultdict(Counter)
-    for focal, apertures in stats.items():
-        for aperture, count in apertures.items():
-            # 将光圈值限制在范围内
-            if aperture < 1.4:
-                processed_aperture = 1.4
-            elif aperture > 16.0:
-                processed_aperture = 16.0
-            else:
-                # 找到最接近的标准光圈值
-                processed_aperture = min(standard_apertures, key=lambda x: abs(x - aperture))
-            processed_stats[focal][processed_aperture] += count
-
-    # 使用处理后的统计数据
-    stats = processed_stats
-    all_apertures = standard_apertures
-
-    # 构建堆叠数据
-    stacked_values = {a: [] for a in all_apertures}
-    for f in focal_lengths:
-        for a in all_apertures:
-            stacked_values[a].append(stats[f].get(a, 0))
+def plot_stacked_bars(stats, folder_path):
+    all_apertures = STANDARD_APERTURES
+
+    # 只画出现过的焦距
+    present = stats.any(axis=1)
+    focal_lengths = np.arange(FOCAL_MIN, FOCAL_MAX + 1)[present]
+
+    # 构建堆叠数据：行为光圈，列为焦距
+    stacked_values = stats[present].T
+    # 每一层的底部为其下方各层之和
+    bottoms = np.cumsum(stacked_values, axis=0) - stacked_values
 
     # 绘图
-    bottom = [0] * len(focal_lengths)
-    plt.figure(figsize=(12, 6))
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
 
     # 为每个光圈值设置固定的颜色
     aperture_colors = {
@@ -133,37 +339,53 @@ def plot_stacked_bars(stats):
     }
 
     for idx, a in enumerate(all_apertures):
-        plt.bar(
+        ax.bar(
             focal_lengths,
-            stacked_values[a],
-            bottom=bottom,
+            stacked_values[idx],
+            bottom=bottoms[idx],
             color=aperture_colors[a],
             label=f"f/{a:.1f}",
             width=1,  # 增加柱子宽度
         )
-        bottom = [i + j for i, j in zip(bottom, stacked_values[a])]
 
-    plt.xlabel("Focal Length")
-    plt.ylabel("Number of Photos")
+    ax.set_xlabel("Focal Length")
+    ax.set_ylabel("Number of Photos")
     # 从路径中提取文件夹名称
     folder_name = os.path.basename(folder_path)
-    plt.title(f"{folder_name}_analysis")
+    ax.set_title(f"{folder_name}_analysis")
     # 固定横坐标为常见定焦焦距值
-    plt.xticks([15, 20, 24, 28, 35, 50, 85, 100, 135, 200])
-    plt.legend(title="Aperture", bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.grid(True, axis='y', linestyle='--', alpha=0.5)
-    plt.tight_layout()
+    ax.set_xticks([15, 20, 24, 28, 35, 50, 85, 100, 135, 200])
+    ax.legend(title="Aperture", bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.grid(True, axis='y', linestyle='--', alpha=0.5)
+    fig.tight_layout()
     # 保存图表，文件名与title相同
-    plt.savefig(f"{folder_name}_analysis.png", dpi=300, bbox_inches='tight')
-    plt.close()  # 关闭图表，释放内存
+    # fig 不受 pyplot 管理，离开作用域即被回收，无需手动关闭
+    fig.savefig(f"{folder_name}_analysis.png", dpi=300, bbox_inches='tight')
+
+# 输出一行进度；整行（含换行符）一次写入，多个线程同时调用也不会混在一起
+def _print_line(msg):
+    with _print_lock:
+        sys.stdout.write(msg + "\n")
+        sys.stdout.flush()
+
+# 处理单个文件夹：统计并绘图（在主进程的线程中运行，EXIF 读取交给共享进程池）
+def _process_folder(folder_path, executor=None):
+    folder = os.path.basename(folder_path)
+    _print_line(f"处理文件夹: {folder}")
+    stats = analyze_folder_recursive(folder_path, executor=executor)
+    if stats.any():
+        plot_stacked_bars(stats, folder_path)
+        _print_line(f"完成文件夹: {folder}，共 {stats.sum()} 张有效照片")
+    else:
+        _print_line(f"文件夹 {folder} 中没有找到有效的EXIF数据")
 
 # 主函数
 if __name__ == "__main__":
     # # ✏️ 在这里直接修改你的照片根目录路径
     # folder_path = "/Volumes/T7 Shield/Syndisk/Life/Photograph/202404_pamier"  # ← 请替换成你的本地路径
     # stats = analyze_folder_recursive(folder_path)
-    # if stats:
-    #     plot_stacked_bars(stats)
+    # if stats.any():
+    #     plot_stacked_bars(stats, folder_path)
     # else:
     #     print("No valid EXIF data found.")
 
@@ -181,12 +403,18 @@ if __name__ == "__main__":
     # 基础路径
     base_path = "/Volumes/T7 Shield/Syndisk/Life/Photograph"
 
-    # 处理每个文件夹
-    for folder in folders:
-        folder_path = os.path.join(base_path, folder)
-        print(f"\n处理文件夹: {folder}")
-        stats = analyze_folder_recursive(folder_path)
-        if stats:
-            plot_stacked_bars(stats)
-        else:
-            print(f"文件夹 {folder} 中没有找到有效的EXIF数据")
+    # 所有进程的日志经队列汇总到主进程，由 QueueListener 单线程输出
+    log_queue = multiprocessing.Queue()
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    _init_worker_logging(log_queue)
+
+    # 各文件夹互不依赖，用线程并行遍历、查缓存和绘图；
+    # 所有文件夹的 EXIF 读取提交到同一个每核一进程的进程池，
+    # 小文件夹处理完后，剩下的大文件夹仍能用满所有核
+    folder_paths = [os.path.join(base_path, folder) for folder in folders]
+    try:
+        with _new_pool() as exif_pool, ThreadPoolExecutor(max_workers=len(folders)) as ex:
+            list(ex.map(_process_folder, folder_paths, [exif_pool] * len(folder_paths)))
+    finally:
+        listener.stop()